@@ -1,111 +1,278 @@
 from __future__ import annotations
 
-import json
 import os
 import sqlite3
+import threading
 from contextlib import contextmanager
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
 
 DB_PATH = os.getenv("PCB_TRACK_DB", "pcb_track.db")
 
+# Stored in PRAGMA user_version.
+#   1: stages_json holds orjson-encoded bytes (BLOB). Older rows may still
+#      hold TEXT; both decode the same, so no data rewrite is needed.
+#   2: boards.total_tasks / approved_tasks, precomputed from stages on write.
+#   3: meta.boards_version, bumped by triggers on every boards write.
+#   4: task counts recomputed with the frontend's progress rules.
+SCHEMA_VERSION = 4
+
+
+# Applied once per connection. WAL lets readers proceed while a writer holds
+# the lock; busy_timeout makes concurrent writers wait instead of failing.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Raised from sqlite3's default of 128 so every distinct query the API issues
+# stays compiled in the per-connection statement cache.
+_CACHED_STATEMENTS = 256
+
+# FastAPI runs sync endpoints on a reused threadpool, so one long-lived
+# connection per worker thread avoids reconnecting on every request.
+_local = threading.local()
+
 
 def _connect() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH, cached_statements=_CACHED_STATEMENTS)
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        _local.conn = conn
     return conn
 
 
+# Whole schema as one script in one write transaction: tables, indexes and
+# the version stamp land together, and nothing is parsed statement by
+# statement from Python.
+_SCHEMA_SQL = f"""
+BEGIN IMMEDIATE;
+
+CREATE TABLE IF NOT EXISTS boards (
+  id TEXT PRIMARY KEY,
+  board_name TEXT NOT NULL,
+  part_number TEXT NOT NULL,
+  revision TEXT NOT NULL,
+  project TEXT NOT NULL,
+  is_new_revision INTEGER NOT NULL,
+  arrived_date TEXT NOT NULL,
+  is_arrived INTEGER NOT NULL,
+  pass_fail_status TEXT,
+  stages_json BLOB NOT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  is_deleted INTEGER NOT NULL,
+  deleted_at TEXT,
+  total_tasks INTEGER NOT NULL DEFAULT 0,
+  approved_tasks INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS change_log (
+  id TEXT PRIMARY KEY,
+  timestamp TEXT NOT NULL,
+  user_role TEXT NOT NULL,
+  user_name TEXT,
+  board_id TEXT NOT NULL,
+  board_name TEXT NOT NULL,
+  revision TEXT NOT NULL,
+  stage TEXT NOT NULL,
+  task TEXT NOT NULL,
+  field TEXT NOT NULL,
+  old_value TEXT NOT NULL,
+  new_value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+  name TEXT PRIMARY KEY
+);
+
+-- Partial index for the default (non-deleted) listing; it replaces the
+-- earlier (is_deleted, created_at) composite and stays much smaller.
+DROP INDEX IF EXISTS idx_boards_active_created;
+CREATE INDEX IF NOT EXISTS idx_boards_active ON boards(created_at DESC) WHERE is_deleted=0;
+CREATE INDEX IF NOT EXISTS idx_boards_created ON boards(created_at DESC);
+
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('boards_version', 0);
+-- Random per database file, so ETags from a reset or recreated DB never
+-- collide with tags a browser cached from the previous one.
+INSERT OR IGNORE INTO meta(key, value) VALUES ('db_nonce', random());
+
+-- boards_version feeds the board-list ETag. The triggers run inside the
+-- writing statement, under SQLite's write lock, so the counter moves in
+-- commit order regardless of the timestamps Python put on the row.
+CREATE TRIGGER IF NOT EXISTS boards_version_insert AFTER INSERT ON boards
+BEGIN
+  UPDATE meta SET value = value + 1 WHERE key = 'boards_version';
+END;
+CREATE TRIGGER IF NOT EXISTS boards_version_update AFTER UPDATE ON boards
+BEGIN
+  UPDATE meta SET value = value + 1 WHERE key = 'boards_version';
+END;
+CREATE TRIGGER IF NOT EXISTS boards_version_delete AFTER DELETE ON boards
+BEGIN
+  UPDATE meta SET value = value + 1 WHERE key = 'boards_version';
+END;
+
+-- Covers SUM(total_tasks), SUM(approved_tasks) over active boards; is_deleted
+-- is repeated as a key so SQLite treats the partial index as covering.
+CREATE INDEX IF NOT EXISTS idx_boards_active_tasks
+  ON boards(total_tasks, approved_tasks, is_deleted) WHERE is_deleted=0;
+
+CREATE INDEX IF NOT EXISTS idx_changelog_board_ts ON change_log(board_id, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_changelog_ts ON change_log(timestamp DESC);
+
+PRAGMA user_version={SCHEMA_VERSION};
+
+COMMIT;
+"""
+
+
 def init_db() -> None:
-    with _connect() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS boards (
-              id TEXT PRIMARY KEY,
-              board_name TEXT NOT NULL,
-              part_number TEXT NOT NULL,
-              revision TEXT NOT NULL,
-              project TEXT NOT NULL,
-              is_new_revision INTEGER NOT NULL,
-              arrived_date TEXT NOT NULL,
-              is_arrived INTEGER NOT NULL,
-              pass_fail_status TEXT,
-              stages_json TEXT NOT NULL,
-              created_at TEXT NOT NULL,
-              updated_at TEXT NOT NULL,
-              is_deleted INTEGER NOT NULL,
-              deleted_at TEXT
-            )
-            """
-        )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS change_log (
-              id TEXT PRIMARY KEY,
-              timestamp TEXT NOT NULL,
-              user_role TEXT NOT NULL,
-              user_name TEXT,
-              board_id TEXT NOT NULL,
-              board_name TEXT NOT NULL,
-              revision TEXT NOT NULL,
-              stage TEXT NOT NULL,
-              task TEXT NOT NULL,
-              field TEXT NOT NULL,
-              old_value TEXT NOT NULL,
-              new_value TEXT NOT NULL
-            )
-            """
-        )
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS users (
-              name TEXT PRIMARY KEY
-            )
-            """
+    conn = _connect()
+    _migrate(conn)
+    conn.executescript(_SCHEMA_SQL)
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    """Upgrade tables created by an older schema before _SCHEMA_SQL runs.
+
+    Fresh databases get every column from _SCHEMA_SQL and skip this.
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= 4:
+        return
+    columns = {r["name"] for r in conn.execute("PRAGMA table_info(boards)")}
+    if not columns:
+        return
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        if "total_tasks" not in columns:
+            conn.execute("ALTER TABLE boards ADD COLUMN total_tasks INTEGER NOT NULL DEFAULT 0")
+            conn.execute("ALTER TABLE boards ADD COLUMN approved_tasks INTEGER NOT NULL DEFAULT 0")
+        rows = conn.execute("SELECT id, stages_json, is_new_revision FROM boards").fetchall()
+        conn.executemany(
+            "UPDATE boards SET total_tasks=?, approved_tasks=? WHERE id=?",
+            [
+                (*count_tasks(orjson.loads(r[1]) if r[1] else [], bool(r[2])), r[0])
+                for r in rows
+            ],
         )
-        conn.commit()
 
 
 @contextmanager
 def db() -> sqlite3.Connection:
     conn = _connect()
-    try:
+    # Commits on success, rolls back on error; the connection stays open.
+    with conn:
         yield conn
-        conn.commit()
-    finally:
-        conn.close()
+
+
+def _objects(value: Any) -> List[Dict[str, Any]]:
+    # Stages are stored unvalidated, so anything that is not a list of
+    # objects is treated as empty rather than failing the write.
+    return [v for v in value if isinstance(v, dict)] if isinstance(value, list) else []
+
+
+# Mirrors calculateBoardProgress in frontend/src/app/types.ts.
+_NEW_REVISION_ONLY_TASKS = frozenset({
+    "EQ Review (Previous revision)",
+    "Bringup notes (Previous revision)",
+    "Mechanical notes (Previous revision)",
+    "Comments 365 (Previous revision)",
+    "Update Issues Excel",
+    "Issues Excel Review",
+})
+
+_SUBCATEGORY_CHECKBOXES = frozenset({"Mechanical", "Embedded", "Software", "System"})
+
+
+def count_tasks(stages: Any, is_new_revision: bool) -> Tuple[int, int]:
+    """Return (total, approved) using the frontend's progress rules.
+
+    Same rules as calculateBoardProgress in frontend/src/app/types.ts, so
+    approved / total is the progress users see:
+    - a task counts as approved once designerApproved is set;
+    - tasks with required=false, and new-revision-only tasks on boards that
+      are not a new revision, are left out;
+    - the Mechanical/Embedded/Software/System subcategories count as one
+      checkbox each, via the subcategory's own designerApproved flag.
+    Malformed subtrees count as having no tasks.
+    """
+
+    def counted(tasks: Any) -> List[Dict[str, Any]]:
+        return [
+            t for t in _objects(tasks)
+            if t.get("required") is not False
+            and (is_new_revision or t.get("name") not in _NEW_REVISION_ONLY_TASKS)
+        ]
+
+    total = approved = 0
+    for stage in _objects(stages):
+        task_lists = [counted(stage.get("tasks"))]
+        for sc in _objects(stage.get("subcategories")):
+            if sc.get("name") in _SUBCATEGORY_CHECKBOXES:
+                total += 1
+                approved += 1 if sc.get("designerApproved") else 0
+            else:
+                task_lists.append(counted(sc.get("tasks")))
+        for tasks in task_lists:
+            total += len(tasks)
+            approved += sum(1 for t in tasks if t.get("designerApproved"))
+    return total, approved
+
+
+# Explicit column order for board/changelog reads. The row_to_* helpers index
+# rows positionally, which skips sqlite3.Row's per-key name lookup.
+BOARD_COLUMNS = (
+    "id, board_name, part_number, revision, project, is_new_revision, "
+    "arrived_date, is_arrived, pass_fail_status, stages_json, created_at, "
+    "is_deleted, deleted_at"
+)
+
+CHANGELOG_COLUMNS = (
+    "id, timestamp, user_role, user_name, board_id, board_name, revision, "
+    "stage, task, field, old_value, new_value"
+)
+
+_CHANGELOG_KEYS = (
+    "id", "timestamp", "userRole", "userName", "boardId", "boardName",
+    "revision", "stage", "task", "field", "oldValue", "newValue",
+)
 
 
 def row_to_board_dict(r: sqlite3.Row) -> Dict[str, Any]:
+    # r is selected with BOARD_COLUMNS. The 0/1 flag columns are left as ints:
+    # callers build PCBBoard from this dict, which coerces them to bool.
     return {
-        "id": r["id"],
-        "boardName": r["board_name"],
-        "partNumber": r["part_number"],
-        "revision": r["revision"],
-        "project": r["project"],
-        "isNewRevision": bool(r["is_new_revision"]),
-        "arrivedDate": r["arrived_date"] or "",
-        "isArrived": bool(r["is_arrived"]),
-        "passFailStatus": r["pass_fail_status"],
-        "stages": json.loads(r["stages_json"]) if r["stages_json"] else [],
-        "createdAt": r["created_at"],
-        "isDeleted": bool(r["is_deleted"]),
-        "deletedAt": r["deleted_at"],
+        "id": r[0],
+        "boardName": r[1],
+        "partNumber": r[2],
+        "revision": r[3],
+        "project": r[4],
+        "isNewRevision": r[5],
+        "arrivedDate": r[6] or "",
+        "isArrived": r[7],
+        "passFailStatus": r[8],
+        "stages": orjson.loads(r[9]) if r[9] else [],
+        "createdAt": r[10],
+        "isDeleted": r[11],
+        "deletedAt": r[12],
         # updated_at is stored but frontend doesn't require it; keep it if you want later
     }
 
 
 def row_to_changelog_dict(r: sqlite3.Row) -> Dict[str, Any]:
-    return {
-        "id": r["id"],
-        "timestamp": r["timestamp"],
-        "userRole": r["user_role"],
-        "userName": r["user_name"],
-        "boardId": r["board_id"],
-        "boardName": r["board_name"],
-        "revision": r["revision"],
-        "stage": r["stage"],
-        "task": r["task"],
-        "field": r["field"],
-        "oldValue": r["old_value"],
-        "newValue": r["new_value"],
-    }
+    # r is selected with CHANGELOG_COLUMNS, whose order matches _CHANGELOG_KEYS.
+    return dict(zip(_CHANGELOG_KEYS, r))
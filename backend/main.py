@@ -1,14 +1,26 @@
 from __future__ import annotations
 
-import json
-from datetime import datetime, timezone
+import bisect
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
-from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+from fastapi import FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-
-from db import db, init_db, row_to_board_dict, row_to_changelog_dict
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import ValidationError
+
+from db import (
+    BOARD_COLUMNS,
+    CHANGELOG_COLUMNS,
+    count_tasks,
+    db,
+    init_db,
+    row_to_board_dict,
+    row_to_changelog_dict,
+)
 from models import (
     PCBBoard,
     CreateBoardRequest,
@@ -16,6 +28,7 @@ from models import (
     CreateChangeLogRequest,
     CreateUserRequest,
     Stage,
+    StagesValidator,
     Task,
     Subcategory,
 )
@@ -34,6 +47,149 @@ app.add_middleware(
 def now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
+
+def new_id() -> str:
+    # 128 random bits as hex in one C call; ids are opaque to the frontend.
+    return secrets.token_hex(16)
+
+
+# Every query the endpoints run is a module-level constant, so each call
+# passes the identical string and hits sqlite3's per-connection statement
+# cache (its size is raised in db.py).
+SQL_BOARD_EXISTS = "SELECT id FROM boards WHERE id=?"
+
+SQL_GET_BOARD_STAGES = "SELECT stages_json FROM boards WHERE id=?"
+
+SQL_DELETE_BOARD = "DELETE FROM boards WHERE id=?"
+
+SQL_DELETE_BOARD_CHANGELOG = "DELETE FROM change_log WHERE board_id=?"
+
+SQL_INSERT_BOARD = """
+    INSERT INTO boards (
+      id, board_name, part_number, revision, project,
+      is_new_revision, arrived_date, is_arrived, pass_fail_status,
+      stages_json, created_at, updated_at, is_deleted, deleted_at,
+      total_tasks, approved_tasks
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_UPDATE_BOARD = """
+    UPDATE boards
+    SET
+      board_name=?,
+      part_number=?,
+      revision=?,
+      project=?,
+      is_new_revision=?,
+      arrived_date=?,
+      is_arrived=?,
+      pass_fail_status=?,
+      stages_json=?,
+      updated_at=?,
+      is_deleted=?,
+      deleted_at=?,
+      total_tasks=?,
+      approved_tasks=?
+    WHERE id=?
+"""
+
+SQL_INSERT_CHANGELOG = """
+    INSERT INTO change_log (
+      id, timestamp, user_role, user_name, board_id, board_name, revision,
+      stage, task, field, old_value, new_value
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_SOFT_DELETE_BOARD = (
+    "UPDATE boards SET is_deleted=1, deleted_at=?, updated_at=? WHERE id=? "
+    f"RETURNING {BOARD_COLUMNS}"
+)
+
+SQL_RESTORE_BOARD = (
+    "UPDATE boards SET is_deleted=0, deleted_at=NULL, updated_at=? WHERE id=? "
+    f"RETURNING {BOARD_COLUMNS}"
+)
+
+# The unfiltered changelog can run to tens of thousands of rows; SQLite builds
+# the JSON array itself so rows never materialize as Python objects.
+SQL_LIST_CHANGELOG_JSON = """
+    SELECT json_group_array(json_object(
+      'id', id,
+      'timestamp', timestamp,
+      'userRole', user_role,
+      'userName', user_name,
+      'boardId', board_id,
+      'boardName', board_name,
+      'revision', revision,
+      'stage', stage,
+      'task', task,
+      'field', field,
+      'oldValue', old_value,
+      'newValue', new_value
+    ))
+    FROM (SELECT * FROM change_log ORDER BY timestamp DESC)
+"""
+
+SQL_LIST_BOARD_CHANGELOG = (
+    f"SELECT {CHANGELOG_COLUMNS} FROM change_log WHERE board_id=? ORDER BY timestamp DESC"
+)
+
+# Answered from idx_boards_active_tasks without touching stages_json.
+SQL_BOARD_STATS = """
+    SELECT COUNT(*), COALESCE(SUM(total_tasks), 0), COALESCE(SUM(approved_tasks), 0)
+    FROM boards
+    WHERE is_deleted=0
+"""
+
+SQL_LIST_USERS = "SELECT name FROM users ORDER BY name ASC"
+
+SQL_INSERT_USER = "INSERT INTO users(name) VALUES (?) ON CONFLICT(name) DO NOTHING"
+
+SQL_DELETE_USER = "DELETE FROM users WHERE name=?"
+
+# Frontend-shaped board object built by SQLite itself (mirrors
+# row_to_board_dict); stages_json is spliced in as-is via json(). The CAST
+# reads the stored BLOB bytes as JSON text instead of rejecting them.
+_BOARD_JSON_OBJECT = """
+    json_object(
+      'id', id,
+      'boardName', board_name,
+      'partNumber', part_number,
+      'revision', revision,
+      'project', project,
+      'arrivedDate', COALESCE(arrived_date, ''),
+      'isArrived', json(CASE WHEN is_arrived THEN 'true' ELSE 'false' END),
+      'passFailStatus', pass_fail_status,
+      'isNewRevision', json(CASE WHEN is_new_revision THEN 'true' ELSE 'false' END),
+      'stages', json(COALESCE(NULLIF(CAST(stages_json AS TEXT), ''), '[]')),
+      'createdAt', created_at,
+      'isDeleted', json(CASE WHEN is_deleted THEN 'true' ELSE 'false' END),
+      'deletedAt', deleted_at
+    )
+"""
+
+# boards_version is bumped by triggers on every boards write; db_nonce is
+# fixed per database file (see db._SCHEMA_SQL).
+SQL_BOARDS_VERSION = """
+    SELECT
+      (SELECT value FROM meta WHERE key='db_nonce'),
+      (SELECT value FROM meta WHERE key='boards_version')
+"""
+
+SQL_GET_BOARD_JSON = f"SELECT {_BOARD_JSON_OBJECT} FROM boards WHERE id=?"
+
+SQL_LIST_BOARDS_JSON = f"""
+    SELECT json_group_array({_BOARD_JSON_OBJECT})
+    FROM (SELECT * FROM boards ORDER BY created_at DESC)
+"""
+
+SQL_LIST_ACTIVE_BOARDS_JSON = f"""
+    SELECT json_group_array({_BOARD_JSON_OBJECT})
+    FROM (SELECT * FROM boards WHERE is_deleted=0 ORDER BY created_at DESC)
+"""
+
 # Stage templates extracted from your types.ts (names: Pre-Schematics, Schematics, etc.)
 STAGE_TEMPLATES = [
     {
@@ -185,38 +341,62 @@ def build_default_stages() -> list[dict]:
     return stages
 
 
+# The template never changes at runtime, so build it (and its JSON) once.
+# PCBBoard keeps stage dicts by reference, so callers must not hand
+# _DEFAULT_STAGES itself to a board; create_board decodes a fresh copy.
+_DEFAULT_STAGES = build_default_stages()
+_DEFAULT_STAGES_JSON = orjson.dumps(_DEFAULT_STAGES)
+_DEFAULT_TASK_COUNTS = {
+    is_new_revision: count_tasks(_DEFAULT_STAGES, is_new_revision)
+    for is_new_revision in (False, True)
+}
+
+
 @app.on_event("startup")
 def _startup() -> None:
     init_db()
+    _load_users()
 
 
 # -----------------------
 # Boards
 # -----------------------
 @app.get("/api/boards", response_model=List[PCBBoard])
-def list_boards(includeDeleted: bool = Query(False)) -> List[PCBBoard]:
+def list_boards(
+    includeDeleted: bool = Query(False),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
+    # SQLite emits the whole JSON array, so rows never become dicts/models here.
+    # Kept sync: the payload grows with every board and its stages, so it runs
+    # on the threadpool instead of stalling the event loop.
+    sql = SQL_LIST_BOARDS_JSON if includeDeleted else SQL_LIST_ACTIVE_BOARDS_JSON
     with db() as conn:
-        if includeDeleted:
-            rows = conn.execute("SELECT * FROM boards ORDER BY created_at DESC").fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM boards WHERE is_deleted=0 ORDER BY created_at DESC"
-            ).fetchall()
-    return [PCBBoard(**row_to_board_dict(r)) for r in rows]
+        # Read before the listing: a write landing in between can only make
+        # the tag older than the payload, which costs one extra 200 later.
+        nonce, version = conn.execute(SQL_BOARDS_VERSION).fetchone()
+        etag = f'"{nonce}-{int(includeDeleted)}-{version}"'
+        # no-cache makes browsers revalidate every poll, so an unchanged table
+        # costs one scalar query and an empty 304.
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if if_none_match and etag in (t.strip() for t in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        (payload,) = conn.execute(sql).fetchone()
+    return Response(content=payload, media_type="application/json", headers=headers)
 
 
 @app.get("/api/boards/{board_id}", response_model=PCBBoard)
-def get_board(board_id: str) -> PCBBoard:
+def get_board(board_id: str) -> Response:
+    # Stored stages are passed through without decoding.
     with db() as conn:
-        r = conn.execute("SELECT * FROM boards WHERE id=?", (board_id,)).fetchone()
+        r = conn.execute(SQL_GET_BOARD_JSON, (board_id,)).fetchone()
     if not r:
         raise HTTPException(status_code=404, detail="Board not found")
-    return PCBBoard(**row_to_board_dict(r))
+    return Response(content=r[0], media_type="application/json")
 
 
 @app.post("/api/boards", response_model=PCBBoard)
 def create_board(req: CreateBoardRequest) -> PCBBoard:
-    board_id = str(uuid4())
+    board_id = new_id()
     ts = now_iso()
 
     board_dict = {
@@ -229,7 +409,7 @@ def create_board(req: CreateBoardRequest) -> PCBBoard:
         "isArrived": False,
         "passFailStatus": None,
         "isNewRevision": req.isNewRevision,
-        "stages": build_default_stages(),
+        "stages": orjson.loads(_DEFAULT_STAGES_JSON),
         "createdAt": ts,
         "isDeleted": False,
         "deletedAt": None,
@@ -237,14 +417,7 @@ def create_board(req: CreateBoardRequest) -> PCBBoard:
 
     with db() as conn:
         conn.execute(
-            """
-            INSERT INTO boards (
-              id, board_name, part_number, revision, project,
-              is_new_revision, arrived_date, is_arrived, pass_fail_status,
-              stages_json, created_at, updated_at, is_deleted, deleted_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            SQL_INSERT_BOARD,
             (
                 board_id,
                 req.boardName,
@@ -255,49 +428,48 @@ def create_board(req: CreateBoardRequest) -> PCBBoard:
                 "",
                 0,
                 None,
-                json.dumps(board_dict["stages"]),
+                _DEFAULT_STAGES_JSON,
                 ts,
                 ts,
                 0,
                 None,
+                *_DEFAULT_TASK_COUNTS[req.isNewRevision],
             ),
         )
 
     return PCBBoard(**board_dict)
 
 
+@app.get("/api/stats")
+def board_stats() -> dict:
+    with db() as conn:
+        boards, total, approved = conn.execute(SQL_BOARD_STATS).fetchone()
+    return {"boardCount": boards, "totalTasks": total, "approvedTasks": approved}
+
+
 @app.put("/api/boards/{board_id}", response_model=PCBBoard)
 def update_board(board_id: str, board: PCBBoard) -> PCBBoard:
     # Ensure path id is source-of-truth
     if board.id != board_id:
         raise HTTPException(status_code=400, detail="Board ID mismatch")
 
+    # Stages are not model-validated, so reject anything orjson cannot store
+    # (e.g. integers wider than 64 bits) as bad input rather than a 500.
+    try:
+        stages_json = orjson.dumps(board.stages)
+    except orjson.JSONEncodeError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid stages: {e}")
+
     # Make sure board exists
     with db() as conn:
-        existing = conn.execute("SELECT id FROM boards WHERE id=?", (board_id,)).fetchone()
+        existing = conn.execute(SQL_BOARD_EXISTS, (board_id,)).fetchone()
         if not existing:
             raise HTTPException(status_code=404, detail="Board not found")
 
         updated_at = now_iso()
 
         conn.execute(
-            """
-            UPDATE boards
-            SET
-              board_name=?,
-              part_number=?,
-              revision=?,
-              project=?,
-              is_new_revision=?,
-              arrived_date=?,
-              is_arrived=?,
-              pass_fail_status=?,
-              stages_json=?,
-              updated_at=?,
-              is_deleted=?,
-              deleted_at=?
-            WHERE id=?
-            """,
+            SQL_UPDATE_BOARD,
             (
                 board.boardName,
                 board.partNumber,
@@ -307,10 +479,11 @@ def update_board(board_id: str, board: PCBBoard) -> PCBBoard:
                 board.arrivedDate or "",
                 1 if board.isArrived else 0,
                 board.passFailStatus,
-                json.dumps([s.model_dump() for s in board.stages]),
+                stages_json,
                 updated_at,
                 1 if (board.isDeleted or False) else 0,
                 board.deletedAt,
+                *count_tasks(board.stages, board.isNewRevision),
                 board_id,
             ),
         )
@@ -318,45 +491,50 @@ def update_board(board_id: str, board: PCBBoard) -> PCBBoard:
     return board
 
 
+@app.get("/api/boards/{board_id}/check")
+def check_board_stages(board_id: str) -> dict:
+    # Debug aid: stages are stored unvalidated, so run the strict models here.
+    with db() as conn:
+        r = conn.execute(SQL_GET_BOARD_STAGES, (board_id,)).fetchone()
+    if not r:
+        raise HTTPException(status_code=404, detail="Board not found")
+    try:
+        StagesValidator.validate_json(r[0] or b"[]")
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    return {"ok": True}
+
+
 @app.post("/api/boards/{board_id}/delete", response_model=PCBBoard)
 def soft_delete_board(board_id: str) -> PCBBoard:
+    deleted_at = now_iso()
     with db() as conn:
-        r = conn.execute("SELECT * FROM boards WHERE id=?", (board_id,)).fetchone()
-        if not r:
-            raise HTTPException(status_code=404, detail="Board not found")
-        deleted_at = now_iso()
-        conn.execute(
-            "UPDATE boards SET is_deleted=1, deleted_at=?, updated_at=? WHERE id=?",
-            (deleted_at, deleted_at, board_id),
-        )
-        r2 = conn.execute("SELECT * FROM boards WHERE id=?", (board_id,)).fetchone()
-    return PCBBoard(**row_to_board_dict(r2))
+        # RETURNING doubles as the existence check: no row means no board.
+        r = conn.execute(SQL_SOFT_DELETE_BOARD, (deleted_at, deleted_at, board_id)).fetchone()
+    if not r:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return PCBBoard(**row_to_board_dict(r))
 
 
 @app.post("/api/boards/{board_id}/restore", response_model=PCBBoard)
 def restore_board(board_id: str) -> PCBBoard:
+    ts = now_iso()
     with db() as conn:
-        r = conn.execute("SELECT * FROM boards WHERE id=?", (board_id,)).fetchone()
-        if not r:
-            raise HTTPException(status_code=404, detail="Board not found")
-        ts = now_iso()
-        conn.execute(
-            "UPDATE boards SET is_deleted=0, deleted_at=NULL, updated_at=? WHERE id=?",
-            (ts, board_id),
-        )
-        r2 = conn.execute("SELECT * FROM boards WHERE id=?", (board_id,)).fetchone()
-    return PCBBoard(**row_to_board_dict(r2))
+        r = conn.execute(SQL_RESTORE_BOARD, (ts, board_id)).fetchone()
+    if not r:
+        raise HTTPException(status_code=404, detail="Board not found")
+    return PCBBoard(**row_to_board_dict(r))
 
 
 @app.delete("/api/boards/{board_id}")
 def permanent_delete_board(board_id: str) -> dict:
     with db() as conn:
-        r = conn.execute("SELECT id FROM boards WHERE id=?", (board_id,)).fetchone()
+        r = conn.execute(SQL_BOARD_EXISTS, (board_id,)).fetchone()
         if not r:
             raise HTTPException(status_code=404, detail="Board not found")
-        conn.execute("DELETE FROM boards WHERE id=?", (board_id,))
+        conn.execute(SQL_DELETE_BOARD, (board_id,))
         # optionally delete changelog entries too:
-        conn.execute("DELETE FROM change_log WHERE board_id=?", (board_id,))
+        conn.execute(SQL_DELETE_BOARD_CHANGELOG, (board_id,))
     return {"ok": True}
 
 
@@ -364,24 +542,20 @@ def permanent_delete_board(board_id: str) -> dict:
 # Change log
 # -----------------------
 @app.get("/api/changelog", response_model=List[ChangeLogEntry])
-def get_changelog(boardId: Optional[str] = None) -> List[ChangeLogEntry]:
+def get_changelog(boardId: Optional[str] = None) -> Response:
     with db() as conn:
-        if boardId:
-            rows = conn.execute(
-                "SELECT * FROM change_log WHERE board_id=? ORDER BY timestamp DESC",
-                (boardId,),
-            ).fetchall()
-        else:
-            rows = conn.execute(
-                "SELECT * FROM change_log ORDER BY timestamp DESC"
-            ).fetchall()
+        if not boardId:
+            (payload,) = conn.execute(SQL_LIST_CHANGELOG_JSON).fetchone()
+            return Response(content=payload, media_type="application/json")
+        rows = conn.execute(SQL_LIST_BOARD_CHANGELOG, (boardId,)).fetchall()
 
-    return [ChangeLogEntry(**row_to_changelog_dict(r)) for r in rows]
+    # Rows are already frontend-shaped; skip per-row model validation.
+    return ORJSONResponse([row_to_changelog_dict(r) for r in rows])
 
 
 @app.post("/api/changelog", response_model=ChangeLogEntry)
 def add_changelog(req: CreateChangeLogRequest) -> ChangeLogEntry:
-    entry_id = str(uuid4())
+    entry_id = new_id()
     ts = now_iso()
     entry = {
         "id": entry_id,
@@ -400,13 +574,7 @@ def add_changelog(req: CreateChangeLogRequest) -> ChangeLogEntry:
 
     with db() as conn:
         conn.execute(
-            """
-            INSERT INTO change_log (
-              id, timestamp, user_role, user_name, board_id, board_name, revision,
-              stage, task, field, old_value, new_value
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            SQL_INSERT_CHANGELOG,
             (
                 entry_id,
                 ts,
@@ -426,14 +594,80 @@ def add_changelog(req: CreateChangeLogRequest) -> ChangeLogEntry:
     return ChangeLogEntry(**entry)
 
 
+@app.post("/api/changelog/batch", response_model=List[ChangeLogEntry])
+def add_changelog_batch(reqs: List[CreateChangeLogRequest]) -> ORJSONResponse:
+    # One transaction and one executemany for all entries of a user action.
+    # Entries are stamped 1 ms apart in request order, so both the SQL
+    # ORDER BY and the frontend's Date-based sort keep the client's order.
+    base = datetime.now(timezone.utc)
+    entries = [
+        {
+            "id": new_id(),
+            "timestamp": (base + timedelta(milliseconds=i)).isoformat(),
+            "userRole": req.userRole,
+            "userName": req.userName,
+            "boardId": req.boardId,
+            "boardName": req.boardName,
+            "revision": req.revision,
+            "stage": req.stage,
+            "task": req.task,
+            "field": req.field,
+            "oldValue": req.oldValue,
+            "newValue": req.newValue,
+        }
+        for i, req in enumerate(reqs)
+    ]
+
+    if entries:
+        with db() as conn:
+            conn.executemany(
+                SQL_INSERT_CHANGELOG,
+                [
+                    (
+                        e["id"],
+                        e["timestamp"],
+                        e["userRole"],
+                        e["userName"],
+                        e["boardId"],
+                        e["boardName"],
+                        e["revision"],
+                        e["stage"],
+                        e["task"],
+                        e["field"],
+                        e["oldValue"],
+                        e["newValue"],
+                    )
+                    for e in entries
+                ],
+            )
+
+    return ORJSONResponse(entries)
+
+
 # -----------------------
 # Users
 # -----------------------
-@app.get("/api/users", response_model=List[str])
-def list_users() -> List[str]:
+# Sorted in-memory copy of the users table, kept in step with every write so
+# user endpoints never re-query and re-sort the whole table. _USERS_SET
+# mirrors it for O(1) membership checks; both change only under _USERS_LOCK.
+_USERS_CACHE: List[str] = []
+_USERS_SET: set[str] = set()
+_USERS_LOCK = threading.Lock()
+
+
+def _load_users() -> None:
     with db() as conn:
-        rows = conn.execute("SELECT name FROM users ORDER BY name ASC").fetchall()
-    return [r["name"] for r in rows]
+        rows = conn.execute(SQL_LIST_USERS).fetchall()
+    with _USERS_LOCK:
+        _USERS_CACHE[:] = [r["name"] for r in rows]
+        _USERS_SET.clear()
+        _USERS_SET.update(_USERS_CACHE)
+
+
+@app.get("/api/users", response_model=List[str])
+async def list_users() -> List[str]:
+    # Pure in-memory read, so it is the one endpoint that runs on the event loop.
+    return _USERS_CACHE[:]
 
 
 @app.post("/api/users", response_model=List[str])
@@ -442,15 +676,24 @@ def add_user(req: CreateUserRequest) -> List[str]:
     if not name:
         raise HTTPException(status_code=400, detail="Name cannot be empty")
 
-    with db() as conn:
-        conn.execute("INSERT OR IGNORE INTO users(name) VALUES (?)", (name,))
-        rows = conn.execute("SELECT name FROM users ORDER BY name ASC").fetchall()
-    return [r["name"] for r in rows]
+    with _USERS_LOCK:
+        # Known name: answer from the cache without touching SQLite.
+        if name in _USERS_SET:
+            return _USERS_CACHE[:]
+        with db() as conn:
+            inserted = conn.execute(SQL_INSERT_USER, (name,)).rowcount
+        if inserted:
+            bisect.insort(_USERS_CACHE, name)
+            _USERS_SET.add(name)
+        return _USERS_CACHE[:]
 
 
 @app.delete("/api/users/{name}", response_model=List[str])
 def remove_user(name: str) -> List[str]:
-    with db() as conn:
-        conn.execute("DELETE FROM users WHERE name=?", (name,))
-        rows = conn.execute("SELECT name FROM users ORDER BY name ASC").fetchall()
-    return [r["name"] for r in rows]
+    with _USERS_LOCK:
+        with db() as conn:
+            conn.execute(SQL_DELETE_USER, (name,))
+        if name in _USERS_SET:
+            _USERS_SET.discard(name)
+            _USERS_CACHE.remove(name)
+        return _USERS_CACHE[:]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional, Literal
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 UserRole = Literal["Designer", "Reviewer"]
@@ -29,6 +29,11 @@ class Stage(BaseModel):
     subcategories: Optional[List[Subcategory]] = None
 
 
+# Strict check of a stages tree. PCBBoard stores stages unvalidated, so this
+# only runs on demand (GET /api/boards/{id}/check).
+StagesValidator = TypeAdapter(List[Stage])
+
+
 class PCBBoard(BaseModel):
     id: str
     boardName: str
@@ -39,7 +44,8 @@ class PCBBoard(BaseModel):
     isArrived: bool = False
     passFailStatus: Optional[Literal["Pass", "Fail"]] = None
     isNewRevision: bool = False
-    stages: List[Stage] = Field(default_factory=list)
+    # Raw stage objects from the frontend, stored as-is; see StagesValidator.
+    stages: List[Dict[str, Any]] = Field(default_factory=list)
     createdAt: str
     isDeleted: Optional[bool] = False
     deletedAt: Optional[str] = None
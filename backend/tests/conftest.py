@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# db.py reads PCB_TRACK_DB at import time, so point it at a scratch file
+# before the app modules are imported.
+os.environ["PCB_TRACK_DB"] = os.path.join(tempfile.mkdtemp(), "pcb_track_test.db")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    with TestClient(main.app) as c:
+        yield c
+
+
+@pytest.fixture
+def board(client):
+    r = client.post(
+        "/api/boards",
+        json={"boardName": "A", "partNumber": "P", "revision": "1", "project": "X"},
+    )
+    assert r.status_code == 200
+    return r.json()
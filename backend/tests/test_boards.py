@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import threading
+
+import orjson
+import pytest
+
+import db as db_module
+import main
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [1, "x"],
+        [[{"name": "S"}]],
+    ],
+)
+def test_update_rejects_non_object_stages(client, board, stages):
+    r = client.put(f"/api/boards/{board['id']}", json={**board, "stages": stages})
+    assert r.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [{"name": "S", "tasks": {"a": 1}}],
+        [{"name": "S", "tasks": [1, "x", None]}],
+        [{"name": "S", "subcategories": [1, {"name": "C", "tasks": "x"}]}],
+        [{"name": "S", "subcategories": {"a": 1}}],
+    ],
+)
+def test_update_accepts_malformed_stage_subtrees(client, board, stages):
+    r = client.put(f"/api/boards/{board['id']}", json={**board, "stages": stages})
+    assert r.status_code == 200
+    assert client.get(f"/api/boards/{board['id']}").json()["stages"] == stages
+    assert client.get(f"/api/boards/{board['id']}/check").status_code == 422
+
+
+def test_update_rejects_unencodable_stages(client, board):
+    stages = [{"name": "S", "tasks": [{"name": "t", "big": 2**70}]}]
+    r = client.put(f"/api/boards/{board['id']}", json={**board, "stages": stages})
+    assert r.status_code == 422
+
+
+def _task_counts(board_id):
+    with main.db() as conn:
+        return tuple(
+            conn.execute(
+                "SELECT total_tasks, approved_tasks FROM boards WHERE id=?", (board_id,)
+            ).fetchone()
+        )
+
+
+def _approve_everything(stages):
+    # What a user can tick in the UI: every task, plus the subcategory-level
+    # checkbox (the frontend never shows tasks inside checkbox subcategories).
+    for stage in stages:
+        for task in stage.get("tasks") or []:
+            task["designerApproved"] = True
+        for sc in stage.get("subcategories") or []:
+            sc["designerApproved"] = True
+
+
+def test_update_counts_approved_tasks(client, board):
+    stages = board["stages"]
+    stages[0]["tasks"][0].update(designerApproved=True)
+    r = client.put(f"/api/boards/{board['id']}", json={**board, "stages": stages})
+    assert r.status_code == 200
+    assert _task_counts(board["id"]) == (47, 1)
+
+
+@pytest.mark.parametrize("is_new_revision, total", [(False, 47), (True, 53)])
+def test_fully_approved_board_reports_all_tasks_approved(client, is_new_revision, total):
+    board = client.post(
+        "/api/boards",
+        json={
+            "boardName": "A",
+            "partNumber": "P",
+            "revision": "1",
+            "project": "X",
+            "isNewRevision": is_new_revision,
+        },
+    ).json()
+    assert _task_counts(board["id"]) == (total, 0)
+
+    stages = board["stages"]
+    _approve_everything(stages)
+    # Optional tasks drop out of both counts, as in calculateBoardProgress.
+    stages[2]["tasks"][0]["required"] = False
+    stages[2]["tasks"][0]["designerApproved"] = False
+    r = client.put(f"/api/boards/{board['id']}", json={**board, "stages": stages})
+    assert r.status_code == 200
+    assert _task_counts(board["id"]) == (total - 1, total - 1)
+
+
+def test_list_etag_changes_on_every_board_write(client, board):
+    etag = client.get("/api/boards").headers["etag"]
+    assert client.get("/api/boards", headers={"If-None-Match": etag}).status_code == 304
+
+    # Same count, and updated_at moved backwards: the tag must still change.
+    with main.db() as conn:
+        conn.execute("UPDATE boards SET updated_at='2000-01-01' WHERE id=?", (board["id"],))
+    r = client.get("/api/boards", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_created_board_does_not_share_default_stages(client):
+    created = main.create_board(
+        main.CreateBoardRequest(boardName="B", partNumber="P", revision="1", project="X")
+    )
+    created.stages[0]["tasks"][0]["designerApproved"] = True
+    assert created.stages[0] is not main._DEFAULT_STAGES[0]
+    assert main._DEFAULT_STAGES[0]["tasks"][0]["designerApproved"] is False
+
+
+def test_list_etag_differs_between_database_files(client, tmp_path, monkeypatch):
+    etag = client.get("/api/boards").headers["etag"]
+
+    # Same content history on a brand-new file must not reuse the old tag.
+    monkeypatch.setattr(db_module, "DB_PATH", str(tmp_path / "fresh.db"))
+    monkeypatch.setattr(db_module, "_local", threading.local())
+    main.init_db()
+    r = client.get("/api/boards", headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["etag"] != etag
+
+
+def test_soft_delete_and_restore_return_updated_board(client, board):
+    deleted = client.post(f"/api/boards/{board['id']}/delete").json()
+    assert deleted["isDeleted"] is True
+    assert deleted["deletedAt"]
+    assert deleted["stages"] == board["stages"]
+    active_ids = [b["id"] for b in client.get("/api/boards").json()]
+    assert board["id"] not in active_ids
+
+    restored = client.post(f"/api/boards/{board['id']}/restore").json()
+    assert restored["isDeleted"] is False
+    assert restored["deletedAt"] is None
+    assert board["id"] in [b["id"] for b in client.get("/api/boards").json()]
+
+
+@pytest.mark.parametrize("action", ["delete", "restore"])
+def test_soft_delete_and_restore_unknown_board(client, action):
+    r = client.post(f"/api/boards/missing/{action}")
+    assert r.status_code == 404
+    assert r.json() == {"detail": "Board not found"}
+
+
+BOARD_KEYS = [
+    "id", "boardName", "partNumber", "revision", "project", "arrivedDate",
+    "isArrived", "passFailStatus", "isNewRevision", "stages", "createdAt",
+    "isDeleted", "deletedAt",
+]
+
+
+def test_list_and_get_emit_frontend_shaped_json(client, board):
+    listed = {b["id"]: b for b in client.get("/api/boards").json()}[board["id"]]
+    fetched = client.get(f"/api/boards/{board['id']}").json()
+
+    for payload in (listed, fetched):
+        assert list(payload) == BOARD_KEYS
+        assert payload["isArrived"] is False
+        assert payload["isNewRevision"] is False
+        assert payload["isDeleted"] is False
+        assert payload["arrivedDate"] == ""
+        assert payload["passFailStatus"] is None
+        assert payload["stages"] == board["stages"]
+    assert client.get("/api/boards/missing").status_code == 404
+
+
+def test_list_is_newest_first_and_filters_deleted(client, board):
+    newer = client.post(
+        "/api/boards",
+        json={"boardName": "N", "partNumber": "P", "revision": "1", "project": "X"},
+    ).json()
+    ids = [b["id"] for b in client.get("/api/boards").json()]
+    assert ids.index(newer["id"]) < ids.index(board["id"])
+
+    client.post(f"/api/boards/{newer['id']}/delete")
+    assert newer["id"] not in [b["id"] for b in client.get("/api/boards").json()]
+    all_ids = [
+        b["id"] for b in client.get("/api/boards", params={"includeDeleted": True}).json()
+    ]
+    assert newer["id"] in all_ids
+
+
+def test_stages_stored_as_blob_and_legacy_text_rows_still_read(client, board):
+    stages = [{"name": "Legacy", "tasks": []}]
+    with main.db() as conn:
+        assert conn.execute(
+            "SELECT typeof(stages_json) FROM boards WHERE id=?", (board["id"],)
+        ).fetchone()[0] == "blob"
+        conn.execute(
+            "UPDATE boards SET stages_json=? WHERE id=?",
+            (orjson.dumps(stages).decode(), board["id"]),
+        )
+
+    assert client.get(f"/api/boards/{board['id']}").json()["stages"] == stages
+    listed = {b["id"]: b for b in client.get("/api/boards").json()}[board["id"]]
+    assert listed["stages"] == stages
+    deleted = client.post(f"/api/boards/{board['id']}/delete").json()
+    assert deleted["stages"] == stages
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+
+def _entry(**overrides):
+    entry = {
+        "userRole": "Designer",
+        "userName": "amy",
+        "boardId": "b1",
+        "boardName": "Board",
+        "revision": "A",
+        "stage": "Layout",
+        "task": "Placement",
+        "field": "Designer Approval",
+        "oldValue": "unchecked",
+        "newValue": "checked",
+    }
+    entry.update(overrides)
+    return entry
+
+
+def test_batch_keeps_request_order(client):
+    reqs = [_entry(boardId="batch-order", task=f"t{i}") for i in range(5)]
+    saved = client.post("/api/changelog/batch", json=reqs).json()
+
+    assert [e["task"] for e in saved] == [f"t{i}" for i in range(5)]
+    stamps = [datetime.fromisoformat(e["timestamp"]) for e in saved]
+    # Strictly increasing at millisecond resolution, as the frontend sorts.
+    assert all(
+        int(b.timestamp() * 1000) > int(a.timestamp() * 1000)
+        for a, b in zip(stamps, stamps[1:])
+    )
+
+    listed = client.get("/api/changelog", params={"boardId": "batch-order"}).json()
+    assert [e["task"] for e in listed] == [f"t{i}" for i in reversed(range(5))]
+
+
+def test_batch_round_trips_every_field(client):
+    saved = client.post(
+        "/api/changelog/batch", json=[_entry(boardId="batch-fields", userName=None)]
+    ).json()
+    listed = client.get("/api/changelog", params={"boardId": "batch-fields"}).json()
+    assert listed == saved
+    assert saved[0]["userName"] is None
+
+
+def test_batch_empty_and_invalid(client):
+    assert client.post("/api/changelog/batch", json=[]).json() == []
+    r = client.post("/api/changelog/batch", json=[_entry(userRole="Nobody")])
+    assert r.status_code == 422
+
+
+def test_unfiltered_changelog_matches_saved_entries(client):
+    first = client.post("/api/changelog", json=_entry(boardId="all-a", userName=None)).json()
+    second = client.post("/api/changelog", json=_entry(boardId="all-b")).json()
+
+    listed = client.get("/api/changelog").json()
+    assert first in listed and second in listed
+    assert listed.index(second) < listed.index(first)
+    assert list(listed[0]) == list(first)
+    stamps = [e["timestamp"] for e in listed]
+    assert stamps == sorted(stamps, reverse=True)
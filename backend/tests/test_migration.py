@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import db as db_module
+import main
+
+# boards as created by the original init_db: TEXT stages, no task counts.
+_V0_BOARDS_SQL = """
+CREATE TABLE boards (
+  id TEXT PRIMARY KEY,
+  board_name TEXT NOT NULL,
+  part_number TEXT NOT NULL,
+  revision TEXT NOT NULL,
+  project TEXT NOT NULL,
+  is_new_revision INTEGER NOT NULL,
+  arrived_date TEXT NOT NULL,
+  is_arrived INTEGER NOT NULL,
+  pass_fail_status TEXT,
+  stages_json TEXT NOT NULL,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  is_deleted INTEGER NOT NULL,
+  deleted_at TEXT
+)
+"""
+
+
+@pytest.fixture
+def v0_db(tmp_path, monkeypatch):
+    path = str(tmp_path / "v0.db")
+    stages = main.build_default_stages()
+    stages[0]["tasks"][0]["designerApproved"] = True
+    conn = sqlite3.connect(path)
+    conn.execute(_V0_BOARDS_SQL)
+    conn.executemany(
+        "INSERT INTO boards VALUES (?, 'A', 'P', '1', 'X', ?, '', 0, NULL, ?, 't', 't', 0, NULL)",
+        [
+            ("old", 0, json.dumps(stages)),
+            ("new-rev", 1, json.dumps(main.build_default_stages())),
+        ],
+    )
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db_module, "DB_PATH", path)
+    monkeypatch.setattr(db_module, "_local", threading.local())
+    return path
+
+
+def _counts(conn):
+    rows = conn.execute("SELECT id, total_tasks, approved_tasks FROM boards")
+    return {r[0]: (r[1], r[2]) for r in rows}
+
+
+def test_init_db_upgrades_v0_database(v0_db):
+    db_module.init_db()
+    conn = db_module._connect()
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == db_module.SCHEMA_VERSION
+    assert _counts(conn) == {"old": (47, 1), "new-rev": (53, 0)}
+    names = {r[0] for r in conn.execute("SELECT name FROM sqlite_master")}
+    assert {
+        "idx_boards_active",
+        "idx_boards_active_tasks",
+        "boards_version_update",
+        "meta",
+    } <= names
+    meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    assert meta.keys() == {"boards_version", "db_nonce"}
+
+    # Legacy TEXT stages still come back through the API projections.
+    with main.db() as c:
+        row = c.execute(main.SQL_GET_BOARD_JSON, ("old",)).fetchone()
+    assert json.loads(row[0])["stages"][0]["tasks"][0]["designerApproved"] is True
+
+
+def test_init_db_is_idempotent_after_upgrade(v0_db):
+    db_module.init_db()
+    conn = db_module._connect()
+    before = _counts(conn)
+    nonce = conn.execute("SELECT value FROM meta WHERE key='db_nonce'").fetchone()[0]
+
+    db_module.init_db()
+    assert _counts(conn) == before
+    assert conn.execute("SELECT value FROM meta WHERE key='db_nonce'").fetchone()[0] == nonce
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import main
+
+
+def test_users_stay_sorted_and_persisted(client):
+    client.post("/api/users", json={"name": "  zed "})
+    client.post("/api/users", json={"name": "amy"})
+    users = client.post("/api/users", json={"name": "mo"}).json()
+    assert users == sorted(users)
+    assert {"amy", "mo", "zed"} <= set(users)
+
+    # The cache mirrors the table: reloading from SQLite gives the same list.
+    main._load_users()
+    assert client.get("/api/users").json() == users
+
+
+def test_remove_user(client):
+    client.post("/api/users", json={"name": "gone"})
+    users = client.delete("/api/users/gone").json()
+    assert "gone" not in users
+    assert client.delete("/api/users/gone").json() == users
+    assert client.get("/api/users").json() == users
+
+
+def test_blank_user_rejected(client):
+    assert client.post("/api/users", json={"name": "   "}).status_code == 400
+
+
+def test_duplicate_add_skips_sqlite(client, monkeypatch):
+    users = client.post("/api/users", json={"name": "dup"}).json()
+
+    def no_db():
+        raise AssertionError("duplicate add should not touch SQLite")
+
+    monkeypatch.setattr(main, "db", no_db)
+    assert client.post("/api/users", json={"name": " dup "}).json() == users
+    assert users.count("dup") == 1
@@ -1,4 +1,4 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useRef } from 'react';
 import { PCBBoard, UserRole, ChangeLogEntry, calculateBoardProgress, migrateBoardTasks, STAGE_TEMPLATES } from './types';
 import { useLocalStorage } from './hooks/useLocalStorage';
 import { BoardsOverview } from './components/BoardsOverview';
@@ -74,8 +74,10 @@ async function apiGetChangeLog(boardId?: string): Promise<ChangeLogEntry[]> {
   return apiRequest<ChangeLogEntry[]>(`/changelog${q}`);
 }
 
-async function apiAddChangeLog(entry: Omit<ChangeLogEntry, 'id' | 'timestamp'>): Promise<ChangeLogEntry> {
-  return apiRequest<ChangeLogEntry>(`/changelog`, { method: 'POST', body: JSON.stringify(entry) });
+async function apiAddChangeLogBatch(
+  entries: Omit<ChangeLogEntry, 'id' | 'timestamp'>[],
+): Promise<ChangeLogEntry[]> {
+  return apiRequest<ChangeLogEntry[]>(`/changelog/batch`, { method: 'POST', body: JSON.stringify(entries) });
 }
 
 async function apiGetUsers(): Promise<string[]> {
@@ -263,6 +265,25 @@ const handleCreateBoard = (
 };
 
 
+  // Log entries produced by one user action are queued and sent together
+  const pendingLogRef = useRef<{ tmpId: string; entry: Omit<ChangeLogEntry, 'id' | 'timestamp'> }[]>([]);
+
+  const flushPendingLog = () => {
+  const pending = pendingLogRef.current;
+  pendingLogRef.current = [];
+
+  (async () => {
+    try {
+      const saved = await apiAddChangeLogBatch(pending.map((p) => p.entry));
+      const savedByTmpId = new Map(pending.map((p, i) => [p.tmpId, saved[i]]));
+      setChangeLog((prev) => prev.map((e) => savedByTmpId.get(e.id) ?? e));
+    } catch (err: any) {
+      console.error(err);
+      toast.error(`Failed to save change log: ${err?.message ?? 'unknown error'}`);
+    }
+  })();
+};
+
   const handleLogChange = (entry: Omit<ChangeLogEntry, 'id' | 'timestamp'>) => {
   // add temporary item so UI updates immediately
   const tmp: ChangeLogEntry = {
@@ -272,15 +293,10 @@ const handleCreateBoard = (
   };
   setChangeLog((prev) => [...prev, tmp]);
 
-  (async () => {
-    try {
-      const saved = await apiAddChangeLog(entry);
-      setChangeLog((prev) => prev.map((e) => (e.id === tmp.id ? saved : e)));
-    } catch (err: any) {
-      console.error(err);
-      toast.error(`Failed to save change log: ${err?.message ?? 'unknown error'}`);
-    }
-  })();
+  pendingLogRef.current.push({ tmpId: tmp.id, entry });
+  if (pendingLogRef.current.length === 1) {
+    setTimeout(flushPendingLog, 0);
+  }
 };
 
   const handleDeleteBoard = (boardId: string) => {